@@ -0,0 +1,176 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing listens here, so routes that reach the database fail fast instead of
+# touching the real deployment
+os.environ["DATABASE_URL"] = "postgresql://studymate@127.0.0.1:1/studymate_test"
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+os.environ.pop("RATE_LIMIT_REDIS_URL", None)
+
+import app as studymate
+
+
+@pytest.fixture(autouse=True)
+def reset_admission_state():
+    studymate._buckets.clear()
+    studymate._buckets_pruned_at = 0.0
+    studymate._recent_writes.clear()
+    studymate._generate_in_flight = 0
+    studymate._db_wait_ewma = 0.0
+    studymate._db_wait_updated_at = 0.0
+    for name in studymate._admission_counters:
+        studymate._admission_counters[name] = 0
+    yield
+
+
+@pytest.fixture
+def client():
+    studymate.app.config["TESTING"] = True
+    with studymate.app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def logged_in(client):
+    with client.session_transaction() as sess:
+        sess["user_id"] = 1
+    return client
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for the shared admission and pinning state"""
+
+    def __init__(self):
+        self.sorted_sets = {}
+        self.values = {}
+        self.expires = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def _score_in(self, score, low, high):
+        low = float("-inf") if low == "-inf" else low
+        high = float("inf") if high == "+inf" else high
+        return low <= score <= high
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.sorted_sets.get(key, {})
+        removed = [m for m, score in members.items() if self._score_in(score, low, high)]
+        for member in removed:
+            del members[member]
+        return len(removed)
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+
+    def zrem(self, key, member):
+        return 1 if self.sorted_sets.get(key, {}).pop(member, None) is not None else 0
+
+    def zcount(self, key, low, high):
+        return sum(1 for score in self.sorted_sets.get(key, {}).values() if self._score_in(score, low, high))
+
+    def expire(self, key, seconds):
+        self.expires[key] = seconds
+        return True
+
+    def setex(self, key, seconds, value):
+        self.values[key] = value
+        self.expires[key] = seconds
+        return True
+
+    def exists(self, key):
+        return int(key in self.values)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(studymate, "_redis_client", client)
+    return client
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = -1
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.db.executed.append((" ".join(sql.split()), params))
+        # Each statement consumes the next queued result: a list of rows or a rowcount
+        result = self.db.results.pop(0) if self.db.results else []
+        if isinstance(result, int):
+            self.rows, self.rowcount = [], result
+        else:
+            self.rows, self.rowcount = list(result), len(result)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """A single fake connection that records statements and replays queued results"""
+
+    def __init__(self):
+        self.executed = []
+        self.results = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(studymate, "get_db_connection", lambda readonly=False: db)
+    return db
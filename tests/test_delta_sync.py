@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import app as studymate
+
+
+def card(card_id, seq, deleted=False):
+    return {
+        "id": card_id,
+        "user_id": 1,
+        "question": f"Q{card_id}",
+        "answer": f"A{card_id}",
+        "created_at": datetime(2026, 1, 1),
+        "updated_at": datetime(2026, 1, 2),
+        "deleted_at": datetime(2026, 1, 3) if deleted else None,
+        "change_seq": seq,
+    }
+
+
+def test_changes_requires_login(client):
+    assert client.get("/api/flashcards/changes").status_code == 401
+
+
+def test_changes_rejects_bad_since_and_limit(logged_in, fake_db):
+    for query in ("since=abc", "since=-1", "since=1.5", "limit=abc", "limit=0", "limit=-5"):
+        response = logged_in.get(f"/api/flashcards/changes?{query}")
+        assert response.status_code == 400, query
+        assert response.get_json() == {"error": "Invalid since token"}
+    assert fake_db.executed == []
+
+
+def test_changes_split_updates_and_tombstones(logged_in, fake_db):
+    fake_db.results = [[card(1, 11), card(2, 12, deleted=True), card(3, 13)]]
+
+    data = logged_in.get("/api/flashcards/changes?since=10").get_json()
+
+    assert [c["id"] for c in data["changes"]] == [1, 3]
+    assert data["changes"][0]["created_at"] == "2026-01-01T00:00:00"
+    assert data["deleted"] == [2]
+    assert data["next_token"] == "13"
+    assert data["has_more"] is False
+    sql, params = fake_db.executed[0]
+    assert "change_seq > %s" in sql and "ORDER BY change_seq" in sql
+    assert params == (1, 10, 10, 501)
+
+
+def test_changes_pages_with_has_more(logged_in, fake_db):
+    fake_db.results = [[card(1, 11), card(2, 12), card(3, 13)]]
+
+    data = logged_in.get("/api/flashcards/changes?since=10&limit=2").get_json()
+
+    assert [c["id"] for c in data["changes"]] == [1, 2]
+    assert data["next_token"] == "12"
+    assert data["has_more"] is True
+
+
+def test_changes_keep_token_when_nothing_changed(logged_in, fake_db):
+    fake_db.results = [[]]
+
+    data = logged_in.get("/api/flashcards/changes?since=42").get_json()
+
+    assert data == {"changes": [], "deleted": [], "next_token": "42", "has_more": False}
+
+
+def test_changes_limit_is_capped(logged_in, fake_db):
+    fake_db.results = [[]]
+
+    logged_in.get("/api/flashcards/changes?limit=100000")
+
+    assert fake_db.executed[0][1][-1] == 1001
+
+
+def test_dashboard_does_not_load_the_deck(logged_in, fake_db):
+    response = logged_in.get("/dashboard")
+
+    assert response.status_code == 200
+    assert not any(sql.startswith("SELECT * FROM flashcards") for sql, _ in fake_db.executed)
+    assert b"studymate:flashcards:1" in response.data
+
+
+def test_logout_clears_stored_deck(logged_in):
+    response = logged_in.get("/logout")
+
+    assert response.headers["Clear-Site-Data"] == '"storage"'
@@ -0,0 +1,168 @@
+import pytest
+
+import app as studymate
+
+
+@pytest.fixture
+def quote_ident(monkeypatch):
+    # The real quote_ident needs a live connection
+    monkeypatch.setattr(studymate.psycopg2.extensions, "quote_ident", lambda name, scope: f'"{name}"')
+
+
+def queue_plain_table_catalog(fake_db, referencing_fks=()):
+    """Catalog answers partition-flashcards sees for an unpartitioned flashcards table"""
+    fake_db.results = [
+        [],                                   # not partitioned yet
+        list(referencing_fks),                # foreign keys referencing flashcards
+        [],                                   # extra unique indexes
+        [],                                   # other triggers
+        [],                                   # other views
+        [("public.flashcards_id_seq", False)],
+        [("FOREIGN KEY (user_id) REFERENCES users(id)",)],
+        [("CREATE INDEX flashcards_user_id_idx ON public.flashcards USING btree (user_id)",)],
+        [("app_rw", "SELECT"), ("PUBLIC", "INSERT")],
+        [("replica_ro", "SELECT")],
+    ]
+
+
+def position(statements, fragment):
+    return next(i for i, sql in enumerate(statements) if fragment in sql)
+
+
+def test_partition_keeps_view_grants(fake_db, quote_ident):
+    queue_plain_table_catalog(fake_db)
+
+    result = studymate.app.test_cli_runner().invoke(args=["partition-flashcards", "--partitions", "2"])
+
+    assert result.exit_code == 0, result.output
+    statements = [sql for sql, _ in fake_db.executed]
+    assert position(statements, "DROP VIEW IF EXISTS flashcards_all") < position(statements, "ALTER TABLE flashcards RENAME")
+    archive_schema = position(statements, "CREATE TABLE IF NOT EXISTS flashcards_archive")
+    assert position(statements, 'GRANT SELECT ON flashcards_all TO "replica_ro"') > archive_schema
+    assert 'GRANT SELECT ON flashcards TO "app_rw"' in statements
+    assert "GRANT INSERT ON flashcards TO PUBLIC" in statements
+    assert fake_db.commits == 1
+
+
+def test_partition_refuses_when_blocked(fake_db, quote_ident):
+    queue_plain_table_catalog(fake_db, referencing_fks=[("reviews", "reviews_card_id_fkey")])
+
+    result = studymate.app.test_cli_runner().invoke(args=["partition-flashcards"])
+
+    assert result.exit_code != 0
+    statements = [sql for sql, _ in fake_db.executed]
+    assert not any("RENAME" in sql or "DROP" in sql for sql in statements)
+    assert fake_db.commits == 0
+
+
+def test_partition_copies_rows_before_dropping_the_old_table(fake_db, quote_ident):
+    queue_plain_table_catalog(fake_db)
+
+    result = studymate.app.test_cli_runner().invoke(args=["partition-flashcards", "--partitions", "2"])
+
+    assert result.exit_code == 0, result.output
+    statements = [sql for sql, _ in fake_db.executed]
+    copied = position(statements, "INSERT INTO flashcards")
+    dropped = position(statements, "DROP TABLE flashcards_unpartitioned")
+    assert position(statements, "PARTITION OF flashcards FOR VALUES WITH (MODULUS 2, REMAINDER 1)") < copied
+    # The serial sequence must outlive the old table
+    assert copied < position(statements, "OWNED BY flashcards.id") < dropped
+    assert dropped < position(statements, "PRIMARY KEY (id, user_id)")
+    assert "ALTER TABLE flashcards ADD FOREIGN KEY (user_id) REFERENCES users(id)" in statements
+
+
+def test_archive_moves_only_tombstones_and_inactive_users_cards(fake_db):
+    fake_db.results = [500, 12]
+
+    result = studymate.app.test_cli_runner().invoke(
+        args=["archive-flashcards", "--months", "6", "--batch-size", "500"])
+
+    assert result.exit_code == 0, result.output
+    assert "Archived 512 flashcards" in result.output
+    # One transaction per batch until a short batch comes back
+    assert len(fake_db.executed) == 2 and fake_db.commits == 2
+    sql, params = fake_db.executed[0]
+    assert params == {"months": 6, "batch_size": 500}
+    assert ("WHERE f.updated_at < NOW() - make_interval(months => %(months)s) "
+            "AND (f.deleted_at IS NOT NULL OR f.user_id IN ( "
+            "SELECT u.id FROM users u WHERE u.last_seen_at < NOW() - make_interval(months => %(months)s)") in sql
+    assert "INSERT INTO flashcards_archive" in sql
+
+
+class RestoreSpy:
+    """Stands in for _restore_archived_cards, recording (user_id, card_id) per call"""
+
+    def __init__(self):
+        self.calls = []
+        self.restored = 0
+
+    def __call__(self, cur, user_id, card_id=None):
+        self.calls.append((user_id, card_id))
+        return self.restored
+
+
+@pytest.fixture
+def restore_spy(monkeypatch):
+    spy = RestoreSpy()
+    monkeypatch.setattr(studymate, "_restore_archived_cards", spy)
+    return spy
+
+
+def test_delete_restores_archived_card_before_soft_deleting(logged_in, fake_db, restore_spy):
+    fake_db.results = [1]
+
+    resp = logged_in.delete("/api/flashcards/42")
+
+    assert resp.status_code == 200
+    assert restore_spy.calls == [(1, 42)]
+    sql, params = fake_db.executed[0]
+    assert sql.startswith("UPDATE flashcards SET deleted_at=NOW()") and params == (42, 1)
+    assert fake_db.commits == 1 and fake_db.rollbacks == 0
+
+
+def test_delete_missing_card_rolls_back(logged_in, fake_db, restore_spy):
+    fake_db.results = [0]
+
+    resp = logged_in.delete("/api/flashcards/42")
+
+    assert resp.status_code == 404
+    assert restore_spy.calls == [(1, 42)]
+    assert fake_db.commits == 0 and fake_db.rollbacks == 1
+
+
+def test_restore_endpoint(logged_in, fake_db, restore_spy):
+    resp = logged_in.post("/api/flashcards/7/restore")
+    assert resp.status_code == 404
+    assert fake_db.commits == 0 and fake_db.rollbacks == 1
+
+    restore_spy.restored = 1
+    resp = logged_in.post("/api/flashcards/7/restore")
+    assert resp.status_code == 200
+    assert restore_spy.calls == [(1, 7), (1, 7)]
+    assert fake_db.commits == 1
+
+
+def test_restore_sql_only_brings_back_live_cards_of_the_user(fake_db):
+    fake_db.results = [3]
+
+    restored = studymate._restore_archived_cards(fake_db.cursor(), 1)
+
+    assert restored == 3
+    sql, params = fake_db.executed[0]
+    assert params == {"user_id": 1, "card_id": None}
+    assert ("DELETE FROM flashcards_archive WHERE user_id=%(user_id)s AND deleted_at IS NULL "
+            "AND (%(card_id)s IS NULL OR id=%(card_id)s)") in sql
+
+
+def test_activity_is_touched_once_a_day(logged_in, fake_db, restore_spy):
+    restore_spy.restored = 2
+    with studymate.app.test_request_context():
+        studymate.session["user_id"] = 1
+        studymate.touch_user_activity()
+        studymate.touch_user_activity()
+        assert "last_write_at" in studymate.session
+
+    assert fake_db.executed == [("UPDATE users SET last_seen_at = NOW() WHERE id = %s", (1,))]
+    assert restore_spy.calls == [(1, None)]
+    assert fake_db.commits == 1
+    assert 1 in studymate._recent_writes
@@ -0,0 +1,162 @@
+import app as studymate
+from conftest import FakeClock
+
+
+def test_token_bucket_allows_burst_then_waits(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "monotonic", clock)
+
+    assert studymate._take_token_local("k", 2, 1.0) == 0
+    assert studymate._take_token_local("k", 2, 1.0) == 0
+    assert studymate._take_token_local("k", 2, 1.0) == 1.0
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "monotonic", clock)
+    studymate._take_token_local("k", 1, 2.0)
+
+    clock.now += 0.25
+    assert studymate._take_token_local("k", 1, 2.0) == 0.25
+    clock.now += 0.25
+    assert studymate._take_token_local("k", 1, 2.0) == 0
+
+
+def test_token_bucket_never_exceeds_capacity(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "monotonic", clock)
+    studymate._take_token_local("k", 2, 1.0)
+
+    clock.now += 3600
+    assert studymate._take_token_local("k", 2, 1.0) == 0
+    assert studymate._take_token_local("k", 2, 1.0) == 0
+    assert studymate._take_token_local("k", 2, 1.0) > 0
+
+
+def test_token_bucket_prunes_idle_buckets_on_allowed_requests(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "monotonic", clock)
+    full_after = max(c / r for c, r in studymate.RATE_LIMITS.values())
+    studymate._take_token_local("idle", 5, 1.0)
+
+    clock.now += full_after + 1
+    assert studymate._take_token_local("active", 5, 1.0) == 0
+
+    assert list(studymate._buckets) == ["active"]
+
+
+def test_token_bucket_prunes_at_most_once_per_refill_period(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "monotonic", clock)
+    full_after = max(c / r for c, r in studymate.RATE_LIMITS.values())
+    start = clock.now
+    studymate._take_token_local("a", 5, 1.0)
+    clock.now = start + full_after / 2
+    studymate._take_token_local("b", 5, 1.0)
+    clock.now = start + full_after + 1
+    studymate._take_token_local("c", 5, 1.0)
+    assert sorted(studymate._buckets) == ["b", "c"]
+
+    # "b" has been idle past full_after now, but the last scan was too recent
+    clock.now = start + full_after * 1.5 + 2
+    studymate._take_token_local("c", 5, 1.0)
+    assert "b" in studymate._buckets
+
+    clock.now = start + full_after * 2 + 2
+    studymate._take_token_local("c", 5, 1.0)
+    assert list(studymate._buckets) == ["c"]
+
+
+def test_api_rate_limit_returns_429_with_retry_after(logged_in):
+    capacity, _ = studymate.RATE_LIMITS["api"]
+    for _ in range(capacity):
+        assert logged_in.get("/api/flashcards/changes?since=bad").status_code == 400
+
+    response = logged_in.get("/api/flashcards/changes?since=bad")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["error"] == "rate_limited"
+    assert studymate._admission_counters["rate_limited"] == 1
+
+
+def test_rate_limit_is_per_route(logged_in):
+    capacity, _ = studymate.RATE_LIMITS["api"]
+    for _ in range(capacity + 1):
+        logged_in.get("/api/flashcards/changes?since=bad")
+
+    response = logged_in.delete("/api/flashcards/1")
+
+    assert response.status_code != 429
+
+
+def test_generate_shed_when_queue_full_keeps_quota(logged_in, monkeypatch):
+    monkeypatch.setattr(studymate, "SHED_GENERATE_QUEUE_DEPTH", 0)
+
+    response = logged_in.post("/generate", data={"notes": "short"})
+
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "overloaded"
+    assert response.headers["Retry-After"] == str(studymate.SHED_RETRY_AFTER_SECONDS)
+    assert studymate._buckets == {}
+    assert studymate._generate_in_flight == 0
+
+
+def test_generate_releases_queue_slot(logged_in):
+    response = logged_in.post("/generate", data={"notes": "short"})
+
+    assert response.status_code == 400
+    assert studymate._generate_in_flight == 0
+
+
+def test_requests_shed_while_db_is_slow(logged_in, monkeypatch):
+    monkeypatch.setattr(studymate.time, "monotonic", FakeClock())
+    studymate._record_db_wait(studymate.SHED_DB_WAIT_SECONDS * 10)
+
+    response = logged_in.get("/api/user/stats")
+
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "overloaded"
+    assert studymate._admission_counters["shed_db_wait"] == 1
+
+
+def test_stale_db_wait_lets_requests_probe_again(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "monotonic", clock)
+    studymate._record_db_wait(studymate.SHED_DB_WAIT_SECONDS * 10)
+    assert studymate._db_overloaded()
+
+    clock.now += studymate.SHED_RETRY_AFTER_SECONDS
+    assert not studymate._db_overloaded()
+
+
+def test_shared_generate_slots_limit_depth(fake_redis, monkeypatch):
+    monkeypatch.setattr(studymate.time, "time", FakeClock())
+    monkeypatch.setattr(studymate, "SHED_GENERATE_QUEUE_DEPTH", 2)
+
+    first = studymate._enter_generate()
+    second = studymate._enter_generate()
+    assert first[0] == second[0] == "redis"
+    assert studymate._enter_generate() is None
+    assert studymate._generate_queue_depth() == 2
+
+    studymate._leave_generate(first)
+    assert studymate._enter_generate() is not None
+
+
+def test_leaked_generate_slot_expires_despite_retries(fake_redis, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "time", clock)
+    monkeypatch.setattr(studymate, "SHED_GENERATE_QUEUE_DEPTH", 1)
+
+    # A worker killed mid-generation never calls _leave_generate
+    assert studymate._enter_generate() is not None
+
+    # Clients keep retrying while the leaked slot is still within its TTL
+    for _ in range(10):
+        clock.now += studymate.GENERATE_SLOT_TTL_SECONDS / 10 - 1
+        assert studymate._enter_generate() is None
+
+    clock.now += 20
+    assert studymate._enter_generate() is not None
+    assert studymate._generate_queue_depth() == 1
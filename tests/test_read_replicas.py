@@ -0,0 +1,164 @@
+import psycopg2
+import pytest
+from flask import session
+
+import app as studymate
+from conftest import FakeClock
+
+
+def test_write_pin_is_shared_through_redis(fake_redis):
+    # A webhook writes for user 7 outside their session, in another worker
+    studymate.mark_user_write(7)
+    studymate._recent_writes.clear()
+
+    with studymate.app.test_request_context():
+        session["user_id"] = 7
+        assert studymate._reads_pinned_to_primary()
+
+    assert fake_redis.expires[studymate.READ_YOUR_WRITES_KEY.format(7)] == studymate.READ_YOUR_WRITES_SECONDS
+
+
+def test_no_pin_without_a_recent_write(fake_redis):
+    with studymate.app.test_request_context():
+        session["user_id"] = 7
+        assert not studymate._reads_pinned_to_primary()
+
+
+PRIMARY = studymate._primary_dsn()
+REPLICA_A = "postgresql://studymate@replica-a/studymate_test"
+REPLICA_B = "postgresql://studymate@replica-b/studymate_test"
+
+
+class FakeConnection:
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self.readonly = False
+        self.closed = False
+
+    def rollback(self):
+        pass
+
+    def set_session(self, readonly):
+        self.readonly = readonly
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def databases(monkeypatch):
+    """Fake primary and two replicas; tests add DSNs to "down" or "unhealthy" """
+    state = {"down": set(), "unhealthy": set(), "connects": [], "health_checks": 0, "opened": []}
+
+    def connect(dsn, **kwargs):
+        state["connects"].append(dsn)
+        if dsn in state["down"]:
+            raise psycopg2.OperationalError(f"{dsn} is down")
+        conn = FakeConnection(dsn)
+        state["opened"].append(conn)
+        return conn
+
+    def is_healthy(conn):
+        state["health_checks"] += 1
+        return conn.dsn not in state["unhealthy"]
+
+    monkeypatch.setattr(studymate.psycopg2, "connect", connect)
+    monkeypatch.setattr(studymate, "_replica_is_healthy", is_healthy)
+    monkeypatch.setattr(studymate, "DATABASE_REPLICA_URLS", [REPLICA_A, REPLICA_B])
+    monkeypatch.setattr(studymate, "_replica_cursor", 0)
+    monkeypatch.setattr(studymate, "_replica_down_until", {})
+    monkeypatch.setattr(studymate, "_replica_checked_at", {})
+    return state
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(studymate.time, "time", clock)
+    return clock
+
+
+def test_reads_round_robin_over_replicas(databases, clock):
+    dsns = [studymate.get_db_connection(readonly=True).dsn for _ in range(3)]
+
+    assert dsns == [REPLICA_A, REPLICA_B, REPLICA_A]
+    assert all(conn.readonly for conn in databases["opened"])
+
+
+def test_writes_always_use_primary(databases, clock):
+    conn = studymate.get_db_connection()
+
+    assert conn.dsn == PRIMARY
+    assert not conn.readonly
+
+
+def test_down_replica_is_skipped_until_retry(databases, clock):
+    databases["down"].add(REPLICA_A)
+    assert studymate.get_db_connection(readonly=True).dsn == REPLICA_B
+
+    databases["down"].clear()
+    databases["connects"].clear()
+    for _ in range(3):
+        assert studymate.get_db_connection(readonly=True).dsn == REPLICA_B
+    assert REPLICA_A not in databases["connects"]
+
+    clock.now += studymate.REPLICA_RETRY_SECONDS
+    dsns = {studymate.get_db_connection(readonly=True).dsn for _ in range(2)}
+    assert dsns == {REPLICA_A, REPLICA_B}
+
+
+def test_replica_failing_health_check_is_closed_and_skipped(databases, clock):
+    databases["unhealthy"].add(REPLICA_A)
+
+    assert studymate.get_db_connection(readonly=True).dsn == REPLICA_B
+    rejected = [conn for conn in databases["opened"] if conn.dsn == REPLICA_A]
+    assert rejected and rejected[0].closed
+    assert studymate._replica_down_until[REPLICA_A] == clock.now + studymate.REPLICA_RETRY_SECONDS
+
+
+def test_passed_health_check_is_reused(databases, clock):
+    studymate.get_db_connection(readonly=True)
+    studymate.get_db_connection(readonly=True)
+    studymate.get_db_connection(readonly=True)
+    assert databases["health_checks"] == 2
+
+    clock.now += studymate.REPLICA_HEALTH_CHECK_SECONDS
+    studymate.get_db_connection(readonly=True)
+    assert databases["health_checks"] == 3
+
+
+def test_reads_fall_back_to_primary_when_no_replica_is_usable(databases, clock):
+    databases["down"].add(REPLICA_A)
+    databases["unhealthy"].add(REPLICA_B)
+
+    conn = studymate.get_db_connection(readonly=True)
+
+    assert conn.dsn == PRIMARY
+    assert not conn.readonly
+
+
+def test_pinned_user_reads_from_primary(databases, clock):
+    with studymate.app.test_request_context():
+        session["user_id"] = 3
+        studymate.mark_user_write(3)
+        assert studymate.get_db_connection(readonly=True).dsn == PRIMARY
+
+        clock.now += studymate.READ_YOUR_WRITES_SECONDS
+        assert studymate.get_db_connection(readonly=True).dsn == REPLICA_A
+
+
+def test_other_users_are_not_pinned(databases, clock):
+    studymate.mark_user_write(3)
+    with studymate.app.test_request_context():
+        session["user_id"] = 4
+        assert studymate.get_db_connection(readonly=True).dsn == REPLICA_A
+
+
+def test_recent_writes_are_pruned_after_pin_window(clock, monkeypatch):
+    monkeypatch.setattr(studymate, "_recent_writes_pruned_at", 0.0)
+    studymate.mark_user_write(1)
+
+    clock.now += studymate.READ_YOUR_WRITES_SECONDS + 1
+    studymate.mark_user_write(2)
+
+    assert list(studymate._recent_writes) == [2]